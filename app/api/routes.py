@@ -1,178 +1,71 @@
-import base64
-from typing import Any, Dict, Optional
-
-import json
-
-from fastapi import APIRouter, BackgroundTasks, File, HTTPException, UploadFile
-from fastapi.responses import HTMLResponse
+import asyncio
+import hashlib
+import logging
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
+
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
+import aiofiles
+import orjson
+from fastapi import APIRouter, File, HTTPException, Request, Response, UploadFile
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
 from app.services.deliver import deliver_to_routebinder
 from app.services.extract import extract_fields
-from app.services.ingest import save_ingest_event
+from app.services.ingest import (
+    flush_job_statuses,
+    load_job,
+    save_ingest_event,
+    staged_upload_path,
+    update_job_status,
+)
+from app.workers.pool import get_pool, replace_pool
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+UPLOAD_FORM_PATH = Path(__file__).resolve().parents[1] / "static" / "upload.html"
+JOB_STREAM_POLL_SECONDS = 1.0
+# Must stay a multiple of 4 so every slice is a whole run of base64 quanta.
+BASE64_CHUNK_SIZE = 64 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
 
-@router.get("/", response_class=HTMLResponse)
-async def upload_form() -> str:
-    return """
-    <html>
-      <head>
-        <title>Lantern Upload</title>
-        <script src="https://cdn.tailwindcss.com"></script>
-      </head>
-      <body class="bg-slate-950 text-slate-100 min-h-screen">
-        <div class="max-w-5xl mx-auto px-6 py-10">
-          <h1 class="text-3xl font-semibold mb-6">Lantern Ingest</h1>
-          <div class="grid gap-6 md:grid-cols-2">
-            <div class="bg-slate-900 rounded-xl p-6 shadow-lg">
-              <form id="upload-form" class="space-y-4">
-                <div>
-                  <label for="file" class="block text-sm font-medium text-slate-300">
-                    Route sheet image
-                  </label>
-                  <input type="file" id="file" name="file" accept="image/*" required
-                    class="mt-2 block w-full text-sm text-slate-200 file:mr-4 file:py-2 file:px-4 file:rounded-lg file:border-0 file:text-sm file:font-semibold file:bg-indigo-500 file:text-white hover:file:bg-indigo-400" />
-                </div>
-                <button type="submit"
-                  class="inline-flex items-center justify-center rounded-lg bg-indigo-500 px-4 py-2 text-sm font-semibold text-white hover:bg-indigo-400">
-                  Upload
-                </button>
-              </form>
-              <div id="status" class="mt-4 text-sm text-slate-300"></div>
-              <div class="mt-3 h-2 w-full rounded-full bg-slate-800">
-                <div id="progress-bar" class="h-2 w-0 rounded-full bg-emerald-400 transition-all"></div>
-              </div>
-            </div>
-            <div class="bg-slate-900 rounded-xl p-6 shadow-lg">
-              <div class="text-sm font-semibold text-slate-300 mb-2">Preview</div>
-              <div class="aspect-video bg-slate-800 rounded-lg flex items-center justify-center overflow-hidden">
-                <img id="preview" src="" alt="Preview" class="hidden w-full h-full object-contain" />
-                <span id="preview-placeholder" class="text-slate-500 text-sm">No image uploaded yet</span>
-              </div>
-            </div>
-          </div>
-          <div class="mt-6 bg-slate-900 rounded-xl p-6 shadow-lg">
-            <div class="text-sm font-semibold text-slate-300 mb-2">Extraction output</div>
-            <pre id="output" class="text-xs text-slate-100 whitespace-pre-wrap"></pre>
-          </div>
-        </div>
-        <script>
-          const form = document.getElementById('upload-form');
-          const status = document.getElementById('status');
-          const output = document.getElementById('output');
-          const preview = document.getElementById('preview');
-          const previewPlaceholder = document.getElementById('preview-placeholder');
-          const progressBar = document.getElementById('progress-bar');
-
-          function setStatus(text) {
-            status.textContent = text;
-          }
-
-          function setProgress(percent) {
-            progressBar.style.width = `${percent}%`;
-          }
-
-          function showPreview(file) {
-            const url = URL.createObjectURL(file);
-            preview.src = url;
-            preview.classList.remove('hidden');
-            previewPlaceholder.classList.add('hidden');
-          }
-
-          async function pollJob(jobId) {
-            while (true) {
-              const response = await fetch(`/jobs/${jobId}`);
-              if (!response.ok) {
-                setStatus('Failed to fetch job status');
-                setProgress(0);
-                return;
-              }
-              const data = await response.json();
-              output.textContent = JSON.stringify(data, null, 2);
-              if (['done', 'failed'].includes(data.status)) {
-                setStatus(`Job ${data.status}`);
-                setProgress(data.status === 'done' ? 100 : 100);
-                return;
-              }
-              if (data.status === 'queued') {
-                setProgress(30);
-              } else if (data.status === 'processing') {
-                setProgress(70);
-              }
-              setStatus(`Job ${data.status}...`);
-              await new Promise(resolve => setTimeout(resolve, 1500));
-            }
-          }
-
-          async function uploadFile(file) {
-            showPreview(file);
-            setStatus('Uploading...');
-            setProgress(10);
-            const formData = new FormData();
-            formData.append('file', file);
-            const response = await fetch('/ingest/image', {
-              method: 'POST',
-              body: formData
-            });
-            if (!response.ok) {
-              setStatus('Upload failed.');
-              output.textContent = await response.text();
-              setProgress(0);
-              return;
-            }
-            const data = await response.json();
-            output.textContent = JSON.stringify(data, null, 2);
-            setStatus('Queued. Polling for status...');
-            setProgress(30);
-            await pollJob(data.job.id);
-          }
-
-          form.addEventListener('submit', async (event) => {
-            event.preventDefault();
-            const fileInput = document.getElementById('file');
-            if (!fileInput.files.length) {
-              setStatus('Select a file first.');
-              return;
-            }
-            await uploadFile(fileInput.files[0]);
-          });
-
-          document.getElementById('file').addEventListener('change', async (event) => {
-            const file = event.target.files[0];
-            if (file) {
-              await uploadFile(file);
-            }
-          });
-        </script>
-      </body>
-    </html>
-    """
+
+@router.get("/", response_class=FileResponse)
+async def upload_form() -> FileResponse:
+    return FileResponse(UPLOAD_FORM_PATH, media_type="text/html")
 
 
 class EmailIngestPayload(BaseModel):
-    image_base64: str = Field(..., description="Base64-encoded image data or data URL")
+    image_base64: bytes = Field(
+        ..., description="Base64-encoded image data or data URL"
+    )
     filename: str = Field("route-sheet.jpg", description="Original filename")
     metadata: Optional[Dict[str, Any]] = None
 
 
 @router.post("/ingest/email")
 async def ingest_email(
-    payload: EmailIngestPayload, background_tasks: BackgroundTasks
+    payload: EmailIngestPayload, request: Request
 ) -> Dict[str, Any]:
     try:
-        image_bytes = _decode_image(payload.image_base64)
+        image_data = _strip_data_url(payload.image_base64)
+        job_record = save_ingest_event(
+            image_chunks=_decode_image_chunks(image_data),
+            filename=payload.filename,
+            metadata=payload.metadata,
+            source="email",
+        )
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
-
-    job_record = save_ingest_event(
-        image_bytes=image_bytes,
-        filename=payload.filename,
-        metadata=payload.metadata,
-        source="email",
-    )
-    background_tasks.add_task(_process_job, job_record)
+    _submit_job(request, job_record)
 
     return {
         "status": "ok",
@@ -182,20 +75,26 @@ async def ingest_email(
 
 @router.post("/ingest/image")
 async def ingest_image(
-    background_tasks: BackgroundTasks,
+    request: Request,
     file: UploadFile = File(...),
 ) -> Dict[str, Any]:
-    image_bytes = await file.read()
-    if not image_bytes:
+    staged_path = staged_upload_path()
+    try:
+        size = await _stream_upload(file, staged_path)
+    except Exception:
+        staged_path.unlink(missing_ok=True)
+        raise
+    if not size:
+        staged_path.unlink(missing_ok=True)
         raise HTTPException(status_code=400, detail="Empty upload")
 
     job_record = save_ingest_event(
-        image_bytes=image_bytes,
+        staged_path=staged_path,
         filename=file.filename or "route-sheet.jpg",
         metadata=None,
         source="upload",
     )
-    background_tasks.add_task(_process_job, job_record)
+    _submit_job(request, job_record)
 
     return {
         "status": "ok",
@@ -204,37 +103,171 @@ async def ingest_image(
 
 
 @router.get("/jobs/{job_id}")
-async def get_job(job_id: str) -> Dict[str, Any]:
-    job_record = _load_job(job_id)
+async def get_job(job_id: str, request: Request) -> Response:
+    job_record = load_job(job_id)
     if not job_record:
         raise HTTPException(status_code=404, detail="Job not found")
-    return job_record
 
+    etag = _job_etag(job_record)
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(
+        content=orjson.dumps(job_record),
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": "no-cache"},
+    )
 
-def _decode_image(image_base64: str) -> bytes:
-    data = image_base64
-    if image_base64.startswith("data:"):
-        try:
-            data = image_base64.split(",", 1)[1]
-        except IndexError as exc:
-            raise ValueError("Invalid data URL") from exc
 
-    try:
-        return base64.b64decode(data, validate=True)
-    except ValueError as exc:
-        raise ValueError("Invalid base64 image") from exc
+@router.get("/jobs/{job_id}/stream")
+async def stream_job(job_id: str, request: Request) -> StreamingResponse:
+    if not load_job(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        _job_event_stream(request, job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
 
 
-def _load_job(job_id: str) -> Dict[str, Any] | None:
-    from app.services.ingest import INBOX_JOBS_DIR
+async def _stream_upload(file: UploadFile, path: Path) -> int:
+    size = 0
+    async with aiofiles.open(path, "wb") as staged:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            await staged.write(chunk)
+            size += len(chunk)
+    return size
+
+
+def _strip_data_url(image_base64: bytes) -> memoryview:
+    data = memoryview(image_base64)
+    if image_base64.startswith(b"data:"):
+        comma = image_base64.find(b",")
+        if comma < 0:
+            raise ValueError("Invalid data URL")
+        data = data[comma + 1 :]
+    return data
+
+
+def _decode_image_chunks(data: memoryview) -> Iterator[bytes]:
+    # Decoding slice by slice straight into the raw image file means the full
+    # decoded image never sits in memory next to its base64 source.
+    for offset in range(0, len(data), BASE64_CHUNK_SIZE):
+        chunk = data[offset : offset + BASE64_CHUNK_SIZE]
+        if offset + BASE64_CHUNK_SIZE < len(data) and chunk[-1:] == b"=":
+            raise ValueError("Invalid base64 image")
+        try:
+            yield base64.b64decode(chunk, validate=True)
+        except ValueError as exc:
+            raise ValueError("Invalid base64 image") from exc
+
+
+def _job_etag(job_record: Dict[str, Any]) -> str:
+    version = job_record.get("updated_at") or job_record.get("received_at")
+    digest = hashlib.blake2b(
+        f"{job_record['status']}:{version}".encode(), digest_size=8
+    ).hexdigest()
+    # Weak, because GZipMiddleware may send the same record in another coding.
+    return f'W/"{digest}"'
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored.
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+async def _job_event_stream(request: Request, job_id: str) -> AsyncIterator[bytes]:
+    last_etag = None
+    worker_finished = False
+    while True:
+        job_record = load_job(job_id)
+        if job_record is None:
+            return
+        etag = _job_etag(job_record)
+        if etag != last_etag:
+            last_etag = etag
+            yield b"data: " + orjson.dumps(job_record) + b"\n\n"
+        if (
+            worker_finished
+            or job_record["status"] in ("done", "failed")
+            or "extraction" in job_record
+        ):
+            return
+
+        # Only jobs submitted by this process have an event; anything else
+        # (other API workers, jobs from before a restart) is re-read on a timer.
+        event = request.app.state.job_events.get(job_id)
+        if event is None:
+            await asyncio.sleep(JOB_STREAM_POLL_SECONDS)
+            continue
+        try:
+            await asyncio.wait_for(event.wait(), timeout=JOB_STREAM_POLL_SECONDS)
+        except asyncio.TimeoutError:
+            continue
+        worker_finished = True
 
-    job_path = INBOX_JOBS_DIR / f"{job_id}.json"
-    if not job_path.exists():
-        return None
-    return json.loads(job_path.read_text(encoding="utf-8"))
+
+def _submit_job(request: Request, job_record: Dict[str, Any]) -> None:
+    job_id = job_record["id"]
+    job_events = request.app.state.job_events
+    loop = asyncio.get_running_loop()
+    try:
+        pool = get_pool()
+        try:
+            future = loop.run_in_executor(pool, _process_job, job_record)
+        except BrokenProcessPool:
+            future = loop.run_in_executor(
+                replace_pool(pool), _process_job, job_record
+            )
+    except Exception as exc:
+        # Queued only: the writer thread applies it without blocking the loop.
+        update_job_status(job_id, "failed", error=str(exc))
+        raise
+    event = job_events[job_id] = asyncio.Event()
+
+    def _release(_future: Optional[asyncio.Future] = None) -> None:
+        event.set()
+        job_events.pop(job_id, None)
+
+    def _job_finished(future: asyncio.Future) -> None:
+        exc = None if future.cancelled() else future.exception()
+        if exc is None:
+            _release()
+            return
+        logger.error("Job %s failed", job_id, exc_info=exc)
+        if isinstance(exc, BrokenProcessPool):
+            replace_pool(pool)
+        # The worker may have died before recording a final status. Streams
+        # are only woken once the failure is in the store.
+        recorded = loop.run_in_executor(
+            None, _record_job_failure, job_id, str(exc) or type(exc).__name__
+        )
+        recorded.add_done_callback(_release)
+
+    future.add_done_callback(_job_finished)
+
+
+def _record_job_failure(job_id: str, error: str) -> None:
+    try:
+        update_job_status(job_id, "failed", error=error)
+        flush_job_statuses()
+    except Exception:
+        logger.exception("Could not save status for job %s", job_id)
 
 
 def _process_job(job_record: Dict[str, Any]) -> None:
-    extraction = extract_fields(job_record)
-    if extraction.get("status") == "done":
-        deliver_to_routebinder(extraction)
+    try:
+        extraction = extract_fields(job_record)
+        if extraction.get("status") == "done":
+            deliver_to_routebinder(extraction)
+    except Exception:
+        # Still land the job's status, but let the original error propagate.
+        try:
+            flush_job_statuses()
+        except Exception:
+            logger.exception("Could not save status for job %s", job_record["id"])
+        raise
+    # The job only counts as finished once its status is in the store.
+    flush_job_statuses()
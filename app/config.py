@@ -4,6 +4,7 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     routebinder_inbox_url: str = ""
     data_dir: str = "data"
+    ocr_workers: int | None = None
 
 
 settings = Settings()
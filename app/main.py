@@ -1,8 +1,27 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.api.routes import router as ingest_router
+from app.workers.pool import shutdown_pool, start_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.job_events = {}
+    start_pool()
+    try:
+        yield
+    finally:
+        shutdown_pool()
+
 
-app = FastAPI(title="Lantern")
+app = FastAPI(
+    title="Lantern", lifespan=lifespan, default_response_class=ORJSONResponse
+)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 
 @app.get("/health")
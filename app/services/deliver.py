@@ -1,15 +1,35 @@
 from typing import Any, Dict
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from app.config import settings
 
+# One keep-alive session per process so consecutive deliveries reuse the
+# TCP/TLS connection to routebinder. Only connection failures are retried;
+# a POST that reached the server is never replayed.
+_session = requests.Session()
+_adapter = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=10,
+    max_retries=Retry(total=3, connect=3, read=0, status=0, backoff_factor=0.5),
+)
+_session.mount("https://", _adapter)
+_session.mount("http://", _adapter)
+
 
 def deliver_to_routebinder(payload: Dict[str, Any]) -> Dict[str, Any]:
     if not settings.routebinder_inbox_url:
         return {"status": "not_configured"}
 
-    response = requests.post(settings.routebinder_inbox_url, json=payload, timeout=10)
+    response = _session.post(
+        settings.routebinder_inbox_url,
+        data=orjson.dumps(payload),
+        headers={"Content-Type": "application/json"},
+        timeout=10,
+    )
     return {
         "status": "delivered" if response.ok else "failed",
         "status_code": response.status_code,
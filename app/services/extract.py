@@ -1,259 +1,544 @@
 from __future__ import annotations
 
-import importlib.util
+import os
 import re
-from dataclasses import dataclass
+import string
+import tempfile
+import threading
+from bisect import bisect_left
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Dict
 
 from app.services.ingest import update_job_status
 
+# The OCR pool already runs one worker per core, and Tesseract's OpenMP
+# threads would only contend with them (tesseract reads this at start).
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
 
-@dataclass
-class ExtractedFields:
-    route: str | None = None
-    site_name: str | None = None
-    address: str | None = None
-    city: str | None = None
-    postal_code: str | None = None
-    gps_latitude: float | None = None
-    gps_longitude: float | None = None
-    service_days: str | None = None
-    time_open: str | None = None
-    time_closed: str | None = None
-    notes: str | None = None
-    salt_product: str | None = None
-    salt_amount: str | None = None
-    salt_unit: str | None = None
-    salt_info: Dict[str, Any] | None = None
+_MISSING_DEPENDENCIES: list[str] = []
+
+try:
+    from PIL import Image, ImageChops, ImageFilter, ImageOps
+except ImportError:
+    Image = ImageChops = ImageFilter = ImageOps = None
+    _MISSING_DEPENDENCIES.append("pillow")
+
+try:
+    from tesserocr import PSM, PyTessBaseAPI
+except ImportError:
+    PSM = PyTessBaseAPI = None
 
+try:
+    import pytesseract
+    from pytesseract import TesseractNotFoundError
+except ImportError:
+    pytesseract = None
+    if PyTessBaseAPI is None:
+        _MISSING_DEPENDENCIES.append("pytesseract")
+
+
+FIELD_KEYS = (
+    "route",
+    "site_name",
+    "address",
+    "city",
+    "postal_code",
+    "gps_latitude",
+    "gps_longitude",
+    "service_days",
+    "time_open",
+    "time_closed",
+    "notes",
+    "salt_product",
+    "salt_amount",
+    "salt_unit",
+    "salt_info",
+)
+
+
+OCR_MAX_DIMENSION = 2400
+# Each pixel is compared with the mean of the box around it; ink has to be
+# this much darker than its surroundings.
+THRESHOLD_RADIUS = 15
+THRESHOLD_OFFSET = 10
+ORIENTATION_ANGLES = (0, 90, 180, 270)
+# Route sheets are a single block of form text; skipping Tesseract's page
+# layout analysis is both faster and steadier on them.
+TESSERACT_CONFIG = "--psm 6"
+
+FIELD_LABELS = {
+    "route": r"route",
+    "site_name": r"slang name",
+    "address": r"address",
+    "city": r"city",
+    "postal_code": r"zip code|zip",
+    "service_days": r"service days",
+    "time_open": r"time open",
+    "time_closed": r"time closed",
+    "notes": r"special notes",
+}
 
 FIELD_PATTERNS = {
-    "route": re.compile(r"route[:\s]*(.*)", re.IGNORECASE),
-    "site_name": re.compile(r"slang name[:\s]*(.*)", re.IGNORECASE),
-    "address": re.compile(r"address[:\s]*(.*)", re.IGNORECASE),
-    "city": re.compile(r"city[:\s]*(.*)", re.IGNORECASE),
-    "postal_code": re.compile(r"(zip code|zip)[:\s]*(.*)", re.IGNORECASE),
-    "service_days": re.compile(r"service days[:\s]*(.*)", re.IGNORECASE),
-    "time_open": re.compile(r"time open[:\s]*(.*)", re.IGNORECASE),
-    "time_closed": re.compile(r"time closed[:\s]*(.*)", re.IGNORECASE),
-    "notes": re.compile(r"special notes[:\s]*(.*)", re.IGNORECASE),
+    key: re.compile(rf"(?:{label})[:\s]*(.*)", re.IGNORECASE)
+    for key, label in FIELD_LABELS.items()
 }
+_FIELD_MATCHERS = {key: pattern.match for key, pattern in FIELD_PATTERNS.items()}
+
+# All labels fused into one alternation so the OCR text is classified with a
+# single scan; ``match.lastgroup`` names the field that matched. The leading
+# lookahead on the labels' first letters lets the engine skip every other
+# position without trying each alternative.
+_LABEL_INITIALS = "".join(sorted({label[0] for label in FIELD_LABELS.values()}))
+FIELD_LABEL_PATTERN = re.compile(
+    rf"(?=[{_LABEL_INITIALS}])(?:"
+    + "|".join(f"(?P<{key}>{label})" for key, label in FIELD_LABELS.items())
+    + ")",
+    re.IGNORECASE,
+)
+
+POSTAL_PATTERN = re.compile(r"([A-Z]{2})\s+(\d{5})")
+SERVICE_DAYS_PATTERN = re.compile(
+    r"(mon|tue|wed|thu|fri|sat|sun)(?:\s*-\s*(mon|tue|wed|thu|fri|sat|sun))?",
+    re.IGNORECASE,
+)
+TIME_PATTERN = re.compile(r"(\d{1,2}:\d{2}\s*[APap][Mm])")
+HOUR_PATTERN = re.compile(r"(\d{1,2})\s*([APap][Mm])")
+# Upper-cases and drops spaces in one pass over a matched "9:30 am".
+TIME_TRANSLATION = str.maketrans(string.ascii_lowercase, string.ascii_uppercase, " ")
+STREET_PATTERN = re.compile(
+    r"\d{2,5}\s+.+\b(rd|road|st|street|ave|avenue|blvd|boulevard|dr|drive|ln|lane|ct|court)\b\.?,?",
+    re.IGNORECASE,
+)
+SALT_PATTERN = re.compile(
+    r"(salt|eco2|reliable blue)\s*(\d+(?:\.\d+)?)?\s*(bags|scoops)?", re.IGNORECASE
+)
+SALT_QUANTITY_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(bags|scoops)?", re.IGNORECASE)
+SCOOPS_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(scoops)?", re.IGNORECASE)
+FOLLOWING_SCOOPS_PATTERN = re.compile(
+    r"(\d+(?:\.\d+)?)\s*(scoops|#\s*scoops)?", re.IGNORECASE
+)
+BAGS_PATTERN = re.compile(r"(\d+(?:\.\d+)?)\s*(bags)?", re.IGNORECASE)
+
+
+# libtesseract is not thread-safe, so the shared in-process API is guarded.
+_TESS_API = None
+_TESS_API_LOCK = threading.Lock()
+
+# Probing spawns `tesseract --version` (or loads language data), so the answer
+# is cached for the life of the process.
+_OCR_PROBED = False
+_OCR_UNAVAILABLE_REASON: str | None = None
+_OCR_PROBE_LOCK = threading.Lock()
+
+
+@dataclass
+class FieldLabelIndex:
+    positions: Dict[str, list[int]]
+    labeled_lines: list[int]
+    # Column of each field's first label, within the line at positions[key][0].
+    columns: Dict[str, int]
+
+
+@dataclass
+class LineScan:
+    salt_info: Dict[str, Any] = field(default_factory=dict)
+    street_index: int | None = None
+    street_line: str | None = None
+    salt_header_index: int | None = None
+
+
+@dataclass
+class ParsedText:
+    text: str
+    lines: list[str]
+    labels: FieldLabelIndex
+    scan: LineScan
 
 
 def extract_fields(job_record: Dict[str, Any]) -> Dict[str, Any]:
-    job_id = job_record.get("id")
-    update_job_status(job_id, "processing")
-    image_path = job_record.get("image_path")
-    if not image_path:
-        update_job_status(job_id, "failed", error="missing image_path")
-        return {"status": "failed", "job_id": job_id, "error": "missing image_path"}
-
-    missing_deps = _missing_dependencies()
-    if missing_deps:
-        message = f"OCR unavailable; missing dependencies: {', '.join(missing_deps)}"
+    return extract_fields_batch([job_record])[0]
+
+
+def extract_fields_batch(job_records: list[Dict[str, Any]]) -> list[Dict[str, Any]]:
+    payloads: list[Dict[str, Any] | None] = [None] * len(job_records)
+    pending: list[tuple[int, Any, tuple[float | None, float | None]]] = []
+    images: list["Image.Image"] = []
+
+    for position, job_record in enumerate(job_records):
+        job_id = job_record.get("id")
+        update_job_status(job_id, "processing")
+        image_path = job_record.get("image_path")
+        if not image_path:
+            update_job_status(job_id, "failed", error="missing image_path")
+            payloads[position] = {
+                "status": "failed",
+                "job_id": job_id,
+                "error": "missing image_path",
+            }
+            continue
+
+        if _MISSING_DEPENDENCIES:
+            message = (
+                "OCR unavailable; missing dependencies: "
+                f"{', '.join(_MISSING_DEPENDENCIES)}"
+            )
+            payloads[position] = _ocr_unavailable(job_id, message)
+            continue
+
+        try:
+            message = _ocr_unavailable_reason()
+            if message:
+                payloads[position] = _ocr_unavailable(job_id, message)
+                continue
+            image = Image.open(Path(image_path))
+            image = ImageOps.exif_transpose(image)
+            images.append(_prepare_for_ocr(image))
+        except Exception as exc:
+            payloads[position] = _ocr_failed(job_id, str(exc))
+            continue
+        # Only the coordinates are kept, so the full-size original can be
+        # released before the next job is loaded.
+        pending.append((position, job_id, _extract_gps_from_image(image)))
+        del image
+
+    # Every orientation of every pending image goes through OCR together.
+    candidates_per_image = _ocr_orientations(images)
+    for (position, job_id, gps), candidates in zip(pending, candidates_per_image):
+        if not candidates:
+            payloads[position] = _ocr_failed(job_id, "OCR failed for all orientations")
+            continue
+        # Each candidate is split and scanned once, for scoring and extraction.
+        parsed = max(map(_parse_text, candidates), key=_score_parsed_text)
+        extracted_text = parsed.text
+        fields = _extract_fields_from_parsed(parsed)
+        fields["gps_latitude"], fields["gps_longitude"] = gps
         payload = {
-            "status": "queued",
+            "status": "done",
             "job_id": job_id,
-            "fields": ExtractedFields().__dict__,
-            "ocr_status": "unavailable",
-            "message": message,
+            "fields": fields,
+            "raw_text": extracted_text,
         }
-        update_job_status(job_id, "queued", extraction=payload, error=message)
-        return payload
+        update_job_status(job_id, "done", extraction=payload)
+        payloads[position] = payload
 
-    from PIL import Image, ImageOps
-    import pytesseract
-    from pytesseract import TesseractNotFoundError
+    return payloads
 
-    try:
-        try:
-            pytesseract.get_tesseract_version()
-        except TesseractNotFoundError as exc:
-            message = str(exc)
-            payload = {
-                "status": "queued",
-                "job_id": job_id,
-                "fields": ExtractedFields().__dict__,
-                "ocr_status": "unavailable",
-                "message": message,
-            }
-            update_job_status(job_id, "queued", extraction=payload, error=message)
-            return payload
-        image = Image.open(Path(image_path))
-        image = ImageOps.exif_transpose(image)
-        extracted_text = _run_ocr_with_orientation(image, pytesseract)
-    except Exception as exc:
-        update_job_status(job_id, "failed", error=str(exc))
-        return {"status": "failed", "job_id": job_id, "error": str(exc)}
-
-    fields = _extract_fields_from_text(extracted_text)
-    gps_latitude, gps_longitude = _extract_gps_from_image(image)
-    fields.gps_latitude = gps_latitude
-    fields.gps_longitude = gps_longitude
+
+def _ocr_unavailable(job_id: Any, message: str) -> Dict[str, Any]:
     payload = {
-        "status": "done",
+        "status": "queued",
         "job_id": job_id,
-        "fields": fields.__dict__,
-        "raw_text": extracted_text,
+        "fields": dict.fromkeys(FIELD_KEYS),
+        "ocr_status": "unavailable",
+        "message": message,
     }
-    update_job_status(job_id, "done", extraction=payload)
+    update_job_status(job_id, "queued", extraction=payload, error=message)
     return payload
 
 
-def _extract_fields_from_text(text: str) -> ExtractedFields:
-    fields = ExtractedFields()
-    lines = [line.strip() for line in text.splitlines() if line.strip()]
+def _ocr_failed(job_id: Any, error: str) -> Dict[str, Any]:
+    update_job_status(job_id, "failed", error=error)
+    return {"status": "failed", "job_id": job_id, "error": error}
+
+
+def warm_up_ocr() -> None:
+    if not _MISSING_DEPENDENCIES:
+        _ocr_unavailable_reason()
 
-    address, city, postal_code = _extract_address_block(lines)
-    fields.address = address
-    fields.city = city
-    fields.postal_code = _normalize_postal_code(postal_code)
+
+def _parse_text(text: str) -> ParsedText:
+    lines = list(filter(None, map(str.strip, text.splitlines())))
+    return ParsedText(
+        text=text,
+        lines=lines,
+        labels=_index_field_labels(lines),
+        scan=_scan_lines(lines),
+    )
+
+
+def _extract_fields_from_parsed(parsed: ParsedText) -> Dict[str, Any]:
+    fields: Dict[str, Any] = dict.fromkeys(FIELD_KEYS)
+    lines, labels, scan = parsed.lines, parsed.labels, parsed.scan
+
+    address, city, postal_code = _extract_address_block(lines, labels, scan)
+    fields["address"] = address
+    fields["city"] = city
+    fields["postal_code"] = _normalize_postal_code(postal_code)
 
     for key in ("route", "site_name", "notes"):
-        value = _extract_field_from_lines(lines, key)
+        value = _extract_field_from_lines(lines, labels, key)
         if value:
-            setattr(fields, key, value)
+            fields[key] = value
 
-    fields.service_days = _extract_service_days(lines)
-    fields.time_open = _extract_time_value(lines, "time_open")
-    fields.time_closed = _extract_time_value(lines, "time_closed")
-    _populate_salt_info(fields, lines)
-    fields.salt_info = _extract_salt_info(lines)
-    _fallback_site_name(fields, lines)
+    fields["service_days"] = _extract_service_days(lines, labels)
+    fields["time_open"] = _extract_time_value(lines, labels, "time_open")
+    fields["time_closed"] = _extract_time_value(lines, labels, "time_closed")
+    _populate_salt_info(fields, lines, scan.salt_header_index)
+    fields["salt_info"] = scan.salt_info
+    _fallback_site_name(fields, lines, scan.street_index)
 
     return fields
 
 
-def _run_ocr_with_orientation(image: "Image.Image", pytesseract_module) -> str:
-    candidates: list[str] = []
-    for angle in (0, 90, 180, 270):
-        rotated = image.rotate(angle, expand=True) if angle else image
+def _prepare_for_ocr(image: "Image.Image") -> "Image.Image":
+    # Tesseract time scales with pixel count; printed sheets read just as well
+    # in grayscale at this size. convert() copies, so the original keeps EXIF.
+    image = image.convert("L")
+    if max(image.size) > OCR_MAX_DIMENSION:
+        image.thumbnail(
+            (OCR_MAX_DIMENSION, OCR_MAX_DIMENSION), Image.Resampling.LANCZOS
+        )
+    return _binarize(image)
+
+
+def _binarize(image: "Image.Image") -> "Image.Image":
+    # A local-mean threshold copes with the uneven lighting of phone photos,
+    # where one global cut-off loses text in the shadows. Handing Tesseract a
+    # two-level image also lets it skip its own thresholding pass.
+    local_mean = image.filter(ImageFilter.BoxBlur(THRESHOLD_RADIUS))
+    darkness = ImageChops.subtract(local_mean, image)
+    return darkness.point(
+        [255 if value <= THRESHOLD_OFFSET else 0 for value in range(256)]
+    )
+
+
+def _ocr_unavailable_reason() -> str | None:
+    global _OCR_PROBED, _OCR_UNAVAILABLE_REASON
+    if not _OCR_PROBED:
+        with _OCR_PROBE_LOCK:
+            if not _OCR_PROBED:
+                _OCR_UNAVAILABLE_REASON = _probe_ocr()
+                _OCR_PROBED = True
+    return _OCR_UNAVAILABLE_REASON
+
+
+def _probe_ocr() -> str | None:
+    if PyTessBaseAPI is not None:
+        try:
+            with _TESS_API_LOCK:
+                _tesserocr_api()
+        except RuntimeError as exc:
+            return str(exc)
+        return None
+
+    try:
+        pytesseract.get_tesseract_version()
+    except TesseractNotFoundError as exc:
+        return str(exc)
+    return None
+
+
+def _tesserocr_api() -> "PyTessBaseAPI":
+    # Callers hold _TESS_API_LOCK. Language data is loaded once per process.
+    global _TESS_API
+    if _TESS_API is None:
+        _TESS_API = PyTessBaseAPI(psm=PSM.SINGLE_BLOCK)
+    return _TESS_API
+
+
+def _image_to_string(image: "Image.Image") -> str:
+    if PyTessBaseAPI is not None:
+        with _TESS_API_LOCK:
+            api = _tesserocr_api()
+            api.SetImage(image)
+            return api.GetUTF8Text()
+    return pytesseract.image_to_string(image, config=TESSERACT_CONFIG)
+
+
+def _rotate(image: "Image.Image", angle: int) -> "Image.Image":
+    return image.rotate(angle, expand=True) if angle else image
+
+
+def _ocr_orientations(images: list["Image.Image"]) -> list[list[str]]:
+    # Returns, per image, the text of every orientation that OCR'd cleanly.
+    if PyTessBaseAPI is None and images:
+        batched = _ocr_image_list(images)
+        if batched is not None:
+            return batched
+
+    results: list[list[str]] = []
+    for image in images:
+        candidates: list[str] = []
+        for angle in ORIENTATION_ANGLES:
+            try:
+                candidates.append(_image_to_string(_rotate(image, angle)))
+            except Exception:
+                continue
+        results.append(candidates)
+    return results
+
+
+def _ocr_image_list(images: list["Image.Image"]) -> list[list[str]] | None:
+    # The tesseract CLI accepts a text file listing image paths and reads them
+    # all in one process, so language data is loaded once for the whole batch.
+    # Pages come back separated by form feeds. Returns None if the batch run
+    # fails, so the caller can retry each orientation on its own.
+    with tempfile.TemporaryDirectory(prefix="lantern_ocr_") as temp_dir:
+        image_paths: list[str] = []
+        for index, image in enumerate(images):
+            for angle in ORIENTATION_ANGLES:
+                path = Path(temp_dir) / f"{index}_{angle}.png"
+                _rotate(image, angle).save(path)
+                image_paths.append(str(path))
+        list_path = Path(temp_dir) / "images.txt"
+        list_path.write_text("\n".join(image_paths) + "\n", encoding="utf-8")
         try:
-            candidates.append(pytesseract_module.image_to_string(rotated))
+            output = pytesseract.image_to_string(
+                str(list_path), config=TESSERACT_CONFIG
+            )
         except Exception:
-            continue
-    if not candidates:
-        raise RuntimeError("OCR failed for all orientations")
-    return max(candidates, key=_score_text)
+            return None
 
+    pages = output.split("\f")
+    if len(pages) < len(image_paths):
+        return None
+    step = len(ORIENTATION_ANGLES)
+    return [pages[start : start + step] for start in range(0, len(image_paths), step)]
 
-def _score_text(text: str) -> int:
+
+def _score_parsed_text(parsed: ParsedText) -> int:
     score = 0
-    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    lines, labels = parsed.lines, parsed.labels
     for key in ("route", "site_name", "address", "city", "postal_code"):
-        if _extract_field_from_lines(lines, key):
+        if _extract_field_from_lines(lines, labels, key):
             score += 2
-    if _extract_service_days(lines):
+    if _extract_service_days(lines, labels):
         score += 1
-    if _extract_time_value(lines, "time_open"):
+    if _extract_time_value(lines, labels, "time_open"):
         score += 1
-    if _extract_time_value(lines, "time_closed"):
+    if _extract_time_value(lines, labels, "time_closed"):
         score += 1
-    if _extract_salt_info(lines).get("eco2_scoops"):
+    if parsed.scan.salt_info.get("eco2_scoops"):
         score += 1
     return score
 
 
-def _extract_field_from_lines(lines: list[str], key: str) -> str | None:
-    pattern = FIELD_PATTERNS[key]
-    for index, line in enumerate(lines):
-        match = pattern.search(line)
-        if match:
-            if key == "postal_code":
-                value = match.group(2)
-            else:
-                value = match.group(1)
-            if value.strip():
-                return value.strip()
-            return _collect_following_lines(lines, index + 1, stop_keys=FIELD_PATTERNS)
+def _index_field_labels(lines: list[str]) -> FieldLabelIndex:
+    positions: Dict[str, list[int]] = {}
+    labeled_lines: list[int] = []
+    columns: Dict[str, int] = {}
+    text = "\n".join(lines)
+    line_index = 0
+    offset = 0
+    for match in FIELD_LABEL_PATTERN.finditer(text):
+        line_index += text.count("\n", offset, match.start())
+        offset = match.start()
+        indexes = positions.setdefault(match.lastgroup, [])
+        if not indexes:
+            columns[match.lastgroup] = offset - text.rfind("\n", 0, offset) - 1
+        if not indexes or indexes[-1] != line_index:
+            indexes.append(line_index)
+        if not labeled_lines or labeled_lines[-1] != line_index:
+            labeled_lines.append(line_index)
+    return FieldLabelIndex(
+        positions=positions, labeled_lines=labeled_lines, columns=columns
+    )
+
+
+def _next_labeled_line(labels: FieldLabelIndex, start_index: int) -> int | None:
+    position = bisect_left(labels.labeled_lines, start_index)
+    if position < len(labels.labeled_lines):
+        return labels.labeled_lines[position]
     return None
 
 
+def _field_value(line: str, labels: FieldLabelIndex, key: str) -> str:
+    # The label scan already found where the label starts, so the pattern
+    # only has to match there rather than search the line for it again.
+    return _FIELD_MATCHERS[key](line, labels.columns[key]).group(1)
+
+
+def _extract_field_from_lines(
+    lines: list[str], labels: FieldLabelIndex, key: str
+) -> str | None:
+    indexes = labels.positions.get(key)
+    if not indexes:
+        return None
+    index = indexes[0]
+    value = _field_value(lines[index], labels, key)
+    if value.strip():
+        return value.strip()
+    return _collect_following_lines(lines, labels, index + 1)
+
+
 def _collect_following_lines(
-    lines: list[str], start_index: int, *, stop_keys: dict[str, re.Pattern]
+    lines: list[str], labels: FieldLabelIndex, start_index: int
 ) -> str | None:
-    collected: list[str] = []
-    for line in lines[start_index:]:
-        if any(pattern.search(line) for pattern in stop_keys.values()):
-            break
-        collected.append(line)
+    collected = _collect_block_lines(lines, labels, start_index)
     value = " ".join(collected).strip()
     return value or None
 
 
 def _extract_address_block(
-    lines: list[str],
+    lines: list[str], labels: FieldLabelIndex, scan: LineScan
 ) -> tuple[str | None, str | None, str | None]:
     address = None
     city = None
     postal_code = None
 
-    for index, line in enumerate(lines):
-        if FIELD_PATTERNS["address"].search(line):
-            block = _collect_block_lines(lines, index + 1, stop_keys=FIELD_PATTERNS)
-            if block:
-                address = block[0]
-            if len(block) > 1:
-                city = block[1]
-            if len(block) > 2:
-                postal_line = block[2]
-                postal_match = re.search(r"([A-Z]{2})\s+(\d{5})", postal_line)
-                if postal_match:
-                    postal_code = f"{postal_match.group(1)} {postal_match.group(2)}"
-            break
-        if not address:
-            address_match = _find_street_line(line)
-            if address_match:
-                address = address_match
-                if index + 1 < len(lines):
-                    city = lines[index + 1]
-                if index + 2 < len(lines):
-                    postal_line = lines[index + 2]
-                    postal_match = re.search(r"([A-Z]{2})\s+(\d{5})", postal_line)
-                    if postal_match:
-                        postal_code = f"{postal_match.group(1)} {postal_match.group(2)}"
-                break
+    address_indexes = labels.positions.get("address")
+    label_index = address_indexes[0] if address_indexes else len(lines)
+    index = scan.street_index
+    if index is not None and index < label_index:
+        address = scan.street_line
+        if index + 1 < len(lines):
+            city = lines[index + 1]
+        if index + 2 < len(lines):
+            postal_line = lines[index + 2]
+            postal_match = POSTAL_PATTERN.search(postal_line)
+            if postal_match:
+                postal_code = f"{postal_match.group(1)} {postal_match.group(2)}"
+        return address, city, postal_code
+
+    if address_indexes:
+        block = _collect_block_lines(lines, labels, label_index + 1)
+        if block:
+            address = block[0]
+        if len(block) > 1:
+            city = block[1]
+        if len(block) > 2:
+            postal_line = block[2]
+            postal_match = POSTAL_PATTERN.search(postal_line)
+            if postal_match:
+                postal_code = f"{postal_match.group(1)} {postal_match.group(2)}"
 
     return address, city, postal_code
 
 
-def _extract_service_days(lines: list[str]) -> str | None:
-    for index, line in enumerate(lines):
-        if FIELD_PATTERNS["service_days"].search(line):
-            if index + 1 < len(lines):
-                candidate = lines[index + 1]
-                match = re.search(
-                    r"(mon|tue|wed|thu|fri|sat|sun)(?:\s*-\s*(mon|tue|wed|thu|fri|sat|sun))?",
-                    candidate,
-                    re.I,
-                )
-                if match:
-                    if match.group(2):
-                        return f"{match.group(1)}-{match.group(2)}".title()
-                    return match.group(1).title()
+def _extract_service_days(lines: list[str], labels: FieldLabelIndex) -> str | None:
+    for index in labels.positions.get("service_days", ()):
+        if index + 1 < len(lines):
+            candidate = lines[index + 1]
+            match = SERVICE_DAYS_PATTERN.search(candidate)
+            if match:
+                if match.group(2):
+                    return f"{match.group(1)}-{match.group(2)}".title()
+                return match.group(1).title()
     return None
 
 
-def _extract_time_value(lines: list[str], key: str) -> str | None:
-    pattern = FIELD_PATTERNS[key]
-    for index, line in enumerate(lines):
-        match = pattern.search(line)
-        if match:
-            value = match.group(1).strip()
-            if value:
-                return _normalize_time_value(value)
-            if index + 1 < len(lines):
-                return _normalize_time_value(lines[index + 1])
+def _extract_time_value(
+    lines: list[str], labels: FieldLabelIndex, key: str
+) -> str | None:
+    indexes = labels.positions.get(key)
+    if not indexes:
+        return None
+    index = indexes[0]
+    value = _field_value(lines[index], labels, key).strip()
+    if value:
+        return _normalize_time_value(value)
+    if index + 1 < len(lines):
+        return _normalize_time_value(lines[index + 1])
     return None
 
 
 def _normalize_time_value(value: str) -> str | None:
     cleaned = value.replace("|", " ").replace("l", "1")
-    match = re.search(r"(\d{1,2}:\d{2}\s*[APap][Mm])", cleaned)
+    match = TIME_PATTERN.search(cleaned)
     if match:
-        return match.group(1).upper().replace(" ", "")
-    match = re.search(r"(\d{1,2})\s*([APap][Mm])", cleaned)
+        return match.group(1).translate(TIME_TRANSLATION)
+    match = HOUR_PATTERN.search(cleaned)
     if match:
         return f"{match.group(1)} {match.group(2).upper()}"
     return cleaned.strip() or None
@@ -262,64 +547,53 @@ def _normalize_time_value(value: str) -> str | None:
 def _normalize_postal_code(value: str | None) -> str | None:
     if not value:
         return None
-    digits = re.sub(r"\\D", "", value)
+    digits = "".join(filter(str.isdecimal, value))
     return digits[-5:] or None
 
 
-def _populate_salt_info(fields: ExtractedFields, lines: list[str]) -> None:
-    joined = " ".join(lines)
-    salt_line = None
-    salt_index = None
-    for index, line in enumerate(lines):
-        if "salt info" in line.lower() or "sidewalk info" in line.lower():
-            salt_line = line
-            salt_index = index
-            break
-    candidate = salt_line or joined
-    match = re.search(
-        r"(salt|eco2|reliable blue)\s*(\d+(?:\.\d+)?)?\s*(bags|scoops)?",
-        candidate,
-        re.I,
-    )
+def _populate_salt_info(
+    fields: Dict[str, Any], lines: list[str], salt_index: int | None
+) -> None:
+    candidate = lines[salt_index] if salt_index is not None else " ".join(lines)
+    match = SALT_PATTERN.search(candidate)
     if match:
-        fields.salt_product = match.group(1)
-        fields.salt_amount = match.group(2)
-        fields.salt_unit = match.group(3)
-        if fields.salt_amount or fields.salt_unit:
+        fields["salt_product"] = match.group(1)
+        fields["salt_amount"] = match.group(2)
+        fields["salt_unit"] = match.group(3)
+        if fields["salt_amount"] or fields["salt_unit"]:
             return
 
     if salt_index is not None:
         for line in lines[salt_index + 1 : salt_index + 4]:
-            quantity = re.search(r"(\d+(?:\.\d+)?)\s*(bags|scoops)?", line, re.I)
+            quantity = SALT_QUANTITY_PATTERN.search(line)
             if quantity:
-                fields.salt_amount = fields.salt_amount or quantity.group(1)
-                fields.salt_unit = fields.salt_unit or quantity.group(2)
+                fields["salt_amount"] = fields["salt_amount"] or quantity.group(1)
+                fields["salt_unit"] = fields["salt_unit"] or quantity.group(2)
                 break
 
 
-def _fallback_site_name(fields: ExtractedFields, lines: list[str]) -> None:
-    if fields.site_name:
+def _fallback_site_name(
+    fields: Dict[str, Any], lines: list[str], street_index: int | None
+) -> None:
+    if fields["site_name"]:
         return
-    for line in lines[:5]:
-        if _find_street_line(line):
-            break
+    for line in lines[: min(5, len(lines) if street_index is None else street_index)]:
         if len(line.split()) >= 2:
-            fields.site_name = line
+            fields["site_name"] = line
             return
 
 
 def _find_street_line(line: str) -> str | None:
-    match = re.search(
-        r"\d{2,5}\s+.+\b(rd|road|st|street|ave|avenue|blvd|boulevard|dr|drive|ln|lane|ct|court)\b\.?,?",
-        line,
-        re.I,
-    )
+    match = STREET_PATTERN.search(line)
     if match:
         return match.group(0).strip()
     return None
 
 
-def _extract_salt_info(lines: list[str]) -> Dict[str, Any]:
+def _scan_lines(lines: list[str]) -> LineScan:
+    # One walk over the lines for everything that isn't keyed by a field label:
+    # the first street line, the salt header and the salt details.
+    scan = LineScan()
     info: Dict[str, Any] = {
         "eco2_scoops": None,
         "reliable_blue_bags": None,
@@ -328,22 +602,29 @@ def _extract_salt_info(lines: list[str]) -> Dict[str, Any]:
         "sidewalk_salt_unit": None,
         "salt_note": None,
     }
-    normalized_lines = [line.lower() for line in lines]
-    for index, (line, lower_line) in enumerate(zip(lines, normalized_lines)):
+    for index, line in enumerate(lines):
+        lower_line = line.lower()
+        if scan.street_index is None:
+            street_line = _find_street_line(line)
+            if street_line:
+                scan.street_index = index
+                scan.street_line = street_line
+        if scan.salt_header_index is None and (
+            "salt info" in lower_line or "sidewalk info" in lower_line
+        ):
+            scan.salt_header_index = index
         if "eco2" in lower_line:
-            match = re.search(r"(\d+(?:\.\d+)?)\s*(scoops)?", line, re.I)
+            match = SCOOPS_PATTERN.search(line)
             if match and (match.group(2) or "scoop" in lower_line):
                 info["eco2_scoops"] = match.group(1)
             else:
                 for next_line in lines[index + 1 : index + 3]:
-                    follow_match = re.search(
-                        r"(\d+(?:\.\d+)?)\s*(scoops|#\s*scoops)?", next_line, re.I
-                    )
+                    follow_match = FOLLOWING_SCOOPS_PATTERN.search(next_line)
                     if follow_match:
                         info["eco2_scoops"] = follow_match.group(1)
                         break
         if "reliable blue" in lower_line:
-            match = re.search(r"(\d+(?:\.\d+)?)\s*(bags)?", line, re.I)
+            match = BAGS_PATTERN.search(line)
             if match:
                 info["reliable_blue_bags"] = match.group(1)
         if "sidewalk info" in lower_line:
@@ -358,23 +639,21 @@ def _extract_salt_info(lines: list[str]) -> Dict[str, Any]:
         info["sidewalk_salt_amount"] = info["reliable_blue_bags"]
         info["sidewalk_salt_unit"] = "bags"
 
-    return info
+    scan.salt_info = info
+    return scan
+
+
+GPS_IFD_TAG = 0x8825
 
 
 def _extract_gps_from_image(image: "Image.Image") -> tuple[float | None, float | None]:
     exif = image.getexif()
     if not exif:
         return None, None
-    gps_info = exif.get(34853)
+    gps_info = exif.get_ifd(GPS_IFD_TAG)
     if not gps_info:
         return None, None
 
-    def _convert(value):
-        try:
-            return float(value[0]) / float(value[1])
-        except Exception:
-            return None
-
     lat_values = gps_info.get(2)
     lat_ref = gps_info.get(1)
     lon_values = gps_info.get(4)
@@ -382,8 +661,10 @@ def _extract_gps_from_image(image: "Image.Image") -> tuple[float | None, float |
     if not lat_values or not lon_values:
         return None, None
 
-    lat = sum(_convert(lat_values[i]) / (60 ** i) for i in range(len(lat_values)))
-    lon = sum(_convert(lon_values[i]) / (60 ** i) for i in range(len(lon_values)))
+    lat = _dms_to_degrees(lat_values)
+    lon = _dms_to_degrees(lon_values)
+    if lat is None or lon is None:
+        return None, None
     if lat_ref in ("S", "s"):
         lat = -lat
     if lon_ref in ("W", "w"):
@@ -391,21 +672,18 @@ def _extract_gps_from_image(image: "Image.Image") -> tuple[float | None, float |
     return lat, lon
 
 
+def _dms_to_degrees(values) -> float | None:
+    try:
+        degrees, minutes, seconds = (
+            value.numerator / value.denominator for value in values
+        )
+    except (AttributeError, TypeError, ValueError, ZeroDivisionError):
+        return None
+    return degrees + minutes / 60 + seconds / 3600
+
+
 def _collect_block_lines(
-    lines: list[str], start_index: int, *, stop_keys: dict[str, re.Pattern]
+    lines: list[str], labels: FieldLabelIndex, start_index: int
 ) -> list[str]:
-    collected: list[str] = []
-    for line in lines[start_index:]:
-        if any(pattern.search(line) for pattern in stop_keys.values()):
-            break
-        collected.append(line)
-    return collected
-
-
-def _missing_dependencies() -> list[str]:
-    missing = []
-    if importlib.util.find_spec("PIL") is None:
-        missing.append("pillow")
-    if importlib.util.find_spec("pytesseract") is None:
-        missing.append("pytesseract")
-    return missing
+    return lines[start_index : _next_labeled_line(labels, start_index)]
+
@@ -1,52 +1,170 @@
-import json
+import base64
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import closing
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterable, Optional
 from uuid import uuid4
 
+import orjson
+
 from app.config import settings
 
 ROOT_DIR = Path(__file__).resolve().parents[2]
 DATA_DIR = ROOT_DIR / settings.data_dir
 INBOX_RAW_DIR = DATA_DIR / "inbox_raw"
 INBOX_JOBS_DIR = DATA_DIR / "inbox_jobs"
+JOBS_DB_PATH = DATA_DIR / "jobs.sqlite3"
+
+_JOBS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    received_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    source TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    image_path TEXT NOT NULL,
+    status TEXT NOT NULL,
+    error TEXT,
+    extraction TEXT
+)
+"""
+
+_UPDATE_JOB_STATUS_SQL = (
+    "UPDATE jobs SET status = ?, updated_at = ?,"
+    " error = COALESCE(?, error), extraction = COALESCE(?, extraction)"
+    " WHERE id = ?"
+)
+
+# Status updates are applied by one writer thread per process, so OCR never
+# waits on SQLite; flush_job_statuses() blocks until they have landed. Write
+# errors are kept per calling thread, so a flush only reports failures of
+# updates that thread queued.
+_STATUS_QUEUE: queue.Queue = queue.Queue()
+_STATUS_WRITER_PID: int | None = None
+_STATUS_WRITER_LOCK = threading.Lock()
+_STATUS_WRITE_ERRORS: Dict[int, Exception] = {}
 
 
 def _job_path(job_id: str) -> Path:
     return INBOX_JOBS_DIR / f"{job_id}.json"
 
 
+def _new_job_id() -> str:
+    # 22 URL-safe characters instead of 32 hex ones, for the same 128 bits.
+    # The alphabet includes "_", so raw image names use "." after the id.
+    return base64.urlsafe_b64encode(uuid4().bytes).rstrip(b"=").decode("ascii")
+
+
+def _connect() -> sqlite3.Connection:
+    connection = sqlite3.connect(JOBS_DB_PATH, timeout=10)
+    connection.row_factory = sqlite3.Row
+    # In WAL mode each status update is an append to the write-ahead log;
+    # NORMAL skips the per-commit fsync and only syncs at checkpoints.
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
 def _ensure_dirs() -> None:
     INBOX_RAW_DIR.mkdir(parents=True, exist_ok=True)
     INBOX_JOBS_DIR.mkdir(parents=True, exist_ok=True)
+    with closing(_connect()) as connection:
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(_JOBS_SCHEMA)
+
+
+_ensure_dirs()
+
+
+def _row_to_record(row: sqlite3.Row) -> Dict[str, Any]:
+    job_record = {
+        "id": row["id"],
+        "received_at": row["received_at"],
+        "updated_at": row["updated_at"],
+        "source": row["source"],
+        "metadata": orjson.loads(row["metadata"]),
+        "image_path": row["image_path"],
+        "status": row["status"],
+    }
+    if row["error"] is not None:
+        job_record["error"] = row["error"]
+    if row["extraction"] is not None:
+        job_record["extraction"] = orjson.loads(row["extraction"])
+    return job_record
+
+
+def staged_upload_path() -> Path:
+    return INBOX_RAW_DIR / f"{uuid4().hex}.part"
 
 
 def save_ingest_event(
     *,
-    image_bytes: bytes,
+    image_chunks: Iterable[bytes] = (),
+    staged_path: Optional[Path] = None,
     filename: str,
     metadata: Optional[Dict[str, Any]],
     source: str,
 ) -> Dict[str, Any]:
-    _ensure_dirs()
-    job_id = uuid4().hex
+    job_id = _new_job_id()
     timestamp = datetime.now(timezone.utc).isoformat()
-    image_path = INBOX_RAW_DIR / f"{job_id}_{filename}"
-    image_path.write_bytes(image_bytes)
+    image_path = INBOX_RAW_DIR / f"{job_id}.{filename}"
+    if staged_path is not None:
+        os.replace(staged_path, image_path)
+    else:
+        try:
+            with image_path.open("wb") as image_file:
+                for chunk in image_chunks:
+                    image_file.write(chunk)
+        except Exception:
+            image_path.unlink(missing_ok=True)
+            raise
 
     job_record = {
         "id": job_id,
         "received_at": timestamp,
+        "updated_at": timestamp,
         "source": source,
         "metadata": metadata or {},
         "image_path": str(image_path),
         "status": "queued",
     }
-    _job_path(job_id).write_text(json.dumps(job_record, indent=2), encoding="utf-8")
+    with closing(_connect()) as connection, connection:
+        connection.execute(
+            "INSERT INTO jobs"
+            " (id, received_at, updated_at, source, metadata, image_path, status)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                job_id,
+                timestamp,
+                timestamp,
+                source,
+                orjson.dumps(job_record["metadata"]).decode(),
+                job_record["image_path"],
+                job_record["status"],
+            ),
+        )
 
     return job_record
 
 
+def load_job(job_id: str) -> Dict[str, Any] | None:
+    with closing(_connect()) as connection:
+        row = connection.execute(
+            "SELECT * FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+    if row is not None:
+        return _row_to_record(row)
+
+    # Jobs ingested before the SQLite store still live as JSON files.
+    job_path = _job_path(job_id)
+    if not job_path.exists():
+        return None
+    return orjson.loads(job_path.read_bytes())
+
+
 def update_job_status(
     job_id: str,
     status: str,
@@ -54,15 +172,67 @@ def update_job_status(
     error: str | None = None,
     extraction: Dict[str, Any] | None = None,
 ) -> None:
-    _ensure_dirs()
-    job_path = _job_path(job_id)
-    if not job_path.exists():
+    _ensure_status_writer()
+    _STATUS_QUEUE.put(
+        (
+            threading.get_ident(),
+            (
+                status,
+                datetime.now(timezone.utc).isoformat(),
+                error or None,
+                orjson.dumps(extraction).decode() if extraction else None,
+                job_id,
+            ),
+        )
+    )
+
+
+def flush_job_statuses() -> None:
+    _STATUS_QUEUE.join()
+    exc = _STATUS_WRITE_ERRORS.pop(threading.get_ident(), None)
+    if exc is not None:
+        raise exc
+
+
+def _ensure_status_writer() -> None:
+    # Started lazily and per process: pool workers only need a writer once
+    # they start reporting job status.
+    global _STATUS_WRITER_PID
+    if _STATUS_WRITER_PID == os.getpid():
         return
+    with _STATUS_WRITER_LOCK:
+        if _STATUS_WRITER_PID != os.getpid():
+            threading.Thread(
+                target=_write_job_statuses, name="job-status-writer", daemon=True
+            ).start()
+            _STATUS_WRITER_PID = os.getpid()
+
 
-    job_record = json.loads(job_path.read_text(encoding="utf-8"))
-    job_record["status"] = status
-    if error:
-        job_record["error"] = error
-    if extraction:
-        job_record["extraction"] = extraction
-    job_path.write_text(json.dumps(job_record, indent=2), encoding="utf-8")
+def _write_job_statuses() -> None:
+    connection: sqlite3.Connection | None = None
+    while True:
+        # Whatever queued up during the last write goes in one transaction.
+        updates = [_STATUS_QUEUE.get()]
+        while True:
+            try:
+                updates.append(_STATUS_QUEUE.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            # Connecting happens here too, so a store that cannot be opened
+            # fails this batch (and its flush) instead of killing the thread.
+            if connection is None:
+                connection = _connect()
+            with connection:
+                connection.executemany(
+                    _UPDATE_JOB_STATUS_SQL, [params for _, params in updates]
+                )
+        except Exception as exc:
+            for caller, _ in updates:
+                _STATUS_WRITE_ERRORS.setdefault(caller, exc)
+            if connection is not None:
+                connection.close()
+                connection = None
+        finally:
+            for _ in updates:
+                _STATUS_QUEUE.task_done()
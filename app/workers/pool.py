@@ -0,0 +1,48 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from app.config import settings
+from app.services.extract import warm_up_ocr
+
+process_pool: ProcessPoolExecutor | None = None
+
+
+def start_pool() -> ProcessPoolExecutor:
+    global process_pool
+    if process_pool is None:
+        # Tesseract is single-threaded per page, so one worker per core.
+        workers = settings.ocr_workers or os.cpu_count() or 1
+        process_pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=warm_up_ocr,
+        )
+        # Spawned workers only start when work is submitted, so give each one
+        # a warm-up task now rather than making the first real jobs wait.
+        for _ in range(workers):
+            process_pool.submit(warm_up_ocr)
+    return process_pool
+
+
+def shutdown_pool() -> None:
+    global process_pool
+    if process_pool is not None:
+        process_pool.shutdown(wait=True)
+        process_pool = None
+
+
+def replace_pool(broken: ProcessPoolExecutor) -> ProcessPoolExecutor:
+    # A worker that dies mid-job (OOM kill, native crash) breaks the whole
+    # executor; later submits would fail until the pool is rebuilt.
+    global process_pool
+    if process_pool is broken:
+        broken.shutdown(wait=False, cancel_futures=True)
+        process_pool = None
+    return start_pool()
+
+
+def get_pool() -> ProcessPoolExecutor:
+    if process_pool is None:
+        raise RuntimeError("OCR worker pool is not running")
+    return process_pool